@@ -29,30 +29,66 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from operator import itemgetter
 from typing import Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+logger = logging.getLogger(__name__)
 
+# orjson encodes and decodes the small, frequent API payloads noticeably
+# faster than the standard library, but is not required
+try:
+    from orjson import dumps as _json_dumps
+    from orjson import loads as _json_loads
+except ImportError:
+    import json
+    from json import loads as _json_loads
+
+    def _json_dumps(obj: object) -> bytes:
+        return json.dumps(obj).encode()
+
+# Constant request payloads, serialized once at import
+_EMPTY_BODY = b'{}'
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Failed connections and transient gateway errors from the bridge are
+# retried; the final response is still returned so callers can inspect its
+# status code. Read and status retries keep urllib3's default idempotent
+# methods, so a command sent by POST is never issued twice
+_RETRY = Retry(total=2, connect=2, read=2, backoff_factor=0.05,
+               status_forcelist=(502, 503, 504), raise_on_status=False)
+
+_get_pose_xyt = itemgetter('x', 'y', 'theta')
+
+
+@dataclass(frozen=True, slots=True)
 class RobotUpdateData:
     """
     Class representing update data for a single robot.
 
+    Instances are immutable, so one snapshot can be handed between the update threads safely.
+
     Attributes:
         robot_name (str): The name of the robot.
         map (str): The name of the map the robot is on.
-        position (list[float]): The position of the robot as [x, y, theta].
+        position (tuple[float, float, float]): The position of the robot as (x, y, theta).
         battery_soc (float): The state of charge of the robot's battery.
         requires_replan (bool | None): Whether the robot requires replanning.
     """
 
-    def __init__(self, robot_name: str, map: str, position: list[float], battery_soc: float
-                 | None = None) -> None:
-        self.robot_name = robot_name
-        self.position = position
-        self.map = map
-        self.battery_soc = battery_soc
-        # self.requires_replan = requires_replan
+    robot_name: str
+    map: str
+    position: tuple[float, float, float]
+    battery_soc: float | None = None
+    requires_replan: bool | None = None
 
 
 class RobotAPI:
@@ -63,24 +99,120 @@ class RobotAPI:
         prefix (str): The URL prefix for the robot API.
         user (str): The username for authenticating with the robot API.
         password (str): The password for authenticating with the robot API.
-        timeout (float): The timeout in seconds for API requests.
+        timeout (float): The read timeout in seconds for API requests.
+        connect_timeout (float): The timeout in seconds for connecting to the robot API server.
         debug (bool): Whether to print debug information.
+        map_cache_ttl (float): How long in seconds the current map name is cached.
+        map_list_cache_ttl (float): How long in seconds the list of maps is cached.
+        connection_check_interval (float): How long in seconds a successful connection check is trusted.
+        unreachable_backoff (float): How long in seconds polling requests fail fast after a connect timeout.
         task_id (str): The ID of the current task.
+        session (requests.Session): The pooled HTTP session used for all API requests. It is shared by
+            every RobotAPI with the same prefix and user, and closed when the last of them is closed.
     """
 
-    def __init__(self, config_yaml: dict) -> None:
+    # Shared sessions and the number of open RobotAPI instances using each
+    _sessions: dict[tuple[str, str], tuple[requests.Session, int]] = {}
+    _sessions_lock = threading.Lock()
+
+    def __init__(self, config_yaml: dict, num_robots: int = 1) -> None:
         """
         Initialize a new RobotAPI instance.
 
         Args:
             config_yaml (dict): A dictionary containing configuration parameters.
+            num_robots (int): The number of robots served by this instance. Default is 1.
         """
         self.prefix = config_yaml['prefix']
         self.user = config_yaml['user']
         self.password = config_yaml['password']
         self.timeout = 5.0
+        self.connect_timeout = 1.0
+        # Endpoint URLs are fixed once the prefix is known, so build them once
+        self._urls = {method: self.prefix + "kachaka/" + method for method in (
+            "get_robot_serial_number", "set_robot_velocity", "move_to_pose", "return_home",
+            "cancel_command", "get_robot_pose", "get_current_map_id", "get_map_list")}
         self.debug = False
         self.task_id = ""
+        self._command_result_url = (self.task_id, self.prefix + "command_result?task_id=")
+        self.map_cache_ttl = 5.0
+        self.map_list_cache_ttl = 60.0
+        self._map_list_cache: dict[str, str] | None = None
+        self._map_list_expiry = 0.0
+        self._current_map_cache: tuple[float, str | None] = (0.0, None)
+        self._etags: dict[str, tuple[str, bytes]] = {}
+        self.connection_check_interval = 2.0
+        self.unreachable_backoff = 5.0
+        self._unreachable_until = 0.0
+        self._last_ok_ts = 0.0
+        with RobotAPI._sessions_lock:
+            self.session, users = RobotAPI._sessions.get((self.prefix, self.user), (None, 0))
+            if self.session is None:
+                self.session = self._make_session()
+            RobotAPI._sessions[(self.prefix, self.user)] = (self.session, users + 1)
+        self._closed = False
+        # One worker per robot for get_data's map lookup
+        self._pool = ThreadPoolExecutor(max_workers=max(num_robots, 1))
+        self._last_velocity: dict[str, tuple[float, float]] = {}
+
+    @staticmethod
+    def _make_session() -> requests.Session:
+        """
+        Create an HTTP session with a pooled, retrying adapter.
+
+        Returns:
+            requests.Session: The new session.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=50, max_retries=_RETRY)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self) -> None:
+        """Release the workers and close the HTTP session once no other instance is using it."""
+        if self._closed:
+            return
+        self._closed = True
+        self._pool.shutdown(wait=False)
+        with RobotAPI._sessions_lock:
+            session, users = RobotAPI._sessions[(self.prefix, self.user)]
+            if users > 1:
+                RobotAPI._sessions[(self.prefix, self.user)] = (session, users - 1)
+                return
+            del RobotAPI._sessions[(self.prefix, self.user)]
+        session.close()
+
+    def _send(self, method: str, url: str, poll: bool = False, **kwargs) -> requests.Response:
+        """
+        Send a request to the robot API, skipping polls while the robot is found unreachable.
+
+        A connect timeout marks the robot unreachable for unreachable_backoff seconds, during
+        which polling requests fail immediately instead of each waiting out the timeout again.
+        Commands such as a cancel are always sent. Any failed request also stops
+        check_connection from trusting its last success.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL to request.
+            poll (bool): Whether this is a periodic status request. Default is False.
+            **kwargs: Extra arguments passed to requests.Session.request.
+
+        Returns:
+            requests.Response: The response.
+
+        Raises:
+            requests.RequestException: If the request fails or a poll is skipped.
+        """
+        if poll and time.monotonic() < self._unreachable_until:
+            raise requests.ConnectionError(f"{self.prefix} is unreachable, skipping request")
+        try:
+            return self.session.request(method, url, timeout=(self.connect_timeout, self.timeout), **kwargs)
+        except requests.RequestException as e:
+            if isinstance(e, requests.ConnectTimeout):
+                self._unreachable_until = time.monotonic() + self.unreachable_backoff
+            self._last_ok_ts = 0.0
+            raise
 
     def check_connection(self) -> bool:
         """
@@ -89,17 +221,27 @@ class RobotAPI:
         Returns:
             bool: True if the connection is successful, False otherwise.
         """
-        url = self.prefix + "kachaka/get_robot_serial_number"
+        now = time.monotonic()
+        if now - self._last_ok_ts < self.connection_check_interval:
+            return True
+
+        url = self._urls["get_robot_serial_number"]
         try:
-            response = requests.get(url, timeout=self.timeout)
-            return response.status_code == 200
+            response = self._send('GET', url, poll=True)
         except requests.RequestException:
             return False
+        if response.status_code != 200:
+            return False
+        self._last_ok_ts = now
+        return True
 
     def navigate(self, robot_name: str, pose: list[float], map_name: str, speed_limit: Optional[float] = None) -> bool:
         """
         Request the robot to navigate to the specified pose.
 
+        A changed speed limit is applied before the move is requested, so the whole move runs
+        under the new limit.
+
         Args:
             robot_name (str): The name of the robot.
             pose (list[float]): The target pose as [x, y, theta].
@@ -109,24 +251,52 @@ class RobotAPI:
         Returns:
             bool: True if the navigation request is successful, False otherwise.
         """
-        # Set linear velocity based on speed limit
+        # Set linear velocity based on speed limit. It is only sent when it
+        # differs from the last limit this robot accepted; a limit lost on
+        # the robot side, e.g. by a reboot, is not sent again until the
+        # limit changes
         if speed_limit is not None:
             linear_velocity = speed_limit if speed_limit > 0.0 else 1.0
-            velocity = {"linear": linear_velocity, "angular": 1.0}
+            if (linear_velocity, 1.0) != self._last_velocity.get(robot_name):
+                self._set_velocity(robot_name, (linear_velocity, 1.0))
 
-            url = self.prefix + "kachaka/set_robot_velocity"
-            requests.post(url, json=velocity)
-
-        url = self.prefix + "kachaka/move_to_pose"
-        position = {"x": pose[0], "y": pose[1], "yaw": pose[2]}
+        url = self._urls["move_to_pose"]
+        position = {"x": float(pose[0]), "y": float(pose[1]), "yaw": float(pose[2])}
         try:
-            response = requests.post(url, json=position)
-            self.task_id = response.json()['id']
+            response = self._send('POST', url, data=_json_dumps(position), headers=_JSON_HEADERS)
+            # A move can take the robot onto another map, so the cached
+            # current map is not trusted past this point
+            self._current_map_cache = (0.0, None)
+            self.task_id = _json_loads(response.content)['id']
             return response.status_code == 200
-        except requests.RequestException as e:
-            print(f"Error in navigate request: {e}")
+        except (requests.RequestException, KeyError, ValueError) as e:
+            logger.warning("Error in navigate request: %s", e)
             return False
 
+    def _set_velocity(self, robot_name: str, velocity: tuple[float, float]) -> None:
+        """
+        Send a velocity limit to the robot and remember it once the robot has accepted it.
+
+        A failed request is only reported and forgets the robot's last limit, so the next
+        navigate sends its limit again.
+
+        Args:
+            robot_name (str): The name of the robot.
+            velocity (tuple[float, float]): The (linear, angular) limit to send.
+        """
+        url = self._urls["set_robot_velocity"]
+        body = _json_dumps({"linear": velocity[0], "angular": velocity[1]})
+        try:
+            response = self._send('POST', url, data=body, headers=_JSON_HEADERS)
+            if response.status_code == 200:
+                self._last_velocity[robot_name] = velocity
+                return
+            error = response.status_code
+        except requests.RequestException as e:
+            error = e
+        logger.warning("Error setting robot velocity: %s", error)
+        self._last_velocity.pop(robot_name, None)
+
     def start_activity(self, robot_name: str, activity: str, label: str) -> bool:
         """
         Request the robot to begin a specified activity.
@@ -142,13 +312,14 @@ class RobotAPI:
         if activity != "dock":
             return False
 
-        url = self.prefix + "kachaka/return_home"
+        url = self._urls["return_home"]
         try:
-            response = requests.post(url, json={})
-            self.task_id = response.json()['id']
+            response = self._send('POST', url, data=_EMPTY_BODY, headers=_JSON_HEADERS)
+            self._current_map_cache = (0.0, None)
+            self.task_id = _json_loads(response.content)['id']
             return response.status_code == 200
-        except requests.RequestException as e:
-            print(f"Error starting activity: {e}")
+        except (requests.RequestException, KeyError, ValueError) as e:
+            logger.warning("Error starting activity: %s", e)
             return False
 
     def get_task_id(self) -> str:
@@ -170,15 +341,17 @@ class RobotAPI:
         Returns:
             bool: True if the stop command is successful, False otherwise.
         """
-        url = self.prefix + "kachaka/cancel_command"
+        url = self._urls["cancel_command"]
         try:
-            response = requests.get(url)
-            return response.json()['cancel_command']['success']
-        except requests.RequestException as e:
-            print(f"Error stopping robot: {e}")
+            response = self._send('GET', url)
+            if response.status_code != 200:
+                return False
+            return _json_loads(response.content)['cancel_command'].get('success', False)
+        except (requests.RequestException, KeyError, ValueError) as e:
+            logger.warning("Error stopping robot: %s", e)
             return False
 
-    def position(self, robot_name: str) -> list[float] | None:
+    def position(self, robot_name: str) -> tuple[float, float, float] | None:
         """
         Get the current position of the robot.
 
@@ -186,18 +359,16 @@ class RobotAPI:
             robot_name (str): The name of the robot.
 
         Returns:
-            list[float] | None: The current position as [x, y, theta], or None if an error occurred.
+            tuple[float, float, float] | None: The current position as (x, y, theta), or None if an error occurred.
         """
-        url = self.prefix + "kachaka/get_robot_pose"
+        url = self._urls["get_robot_pose"]
         try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                res = response.json()['get_robot_pose']
-                return [res['x'], res['y'], res['theta']]
-            else:
+            response = self._send('GET', url, poll=True)
+            if response.status_code != 200:
                 return None
-        except requests.RequestException as e:
-            print(f"Error getting robot position: {e}")
+            return _get_pose_xyt(_json_loads(response.content)['get_robot_pose'])
+        except (requests.RequestException, KeyError, ValueError) as e:
+            logger.warning("Error getting robot position: %s", e)
             return None
 
     def battery_soc(self, robot_name: str) -> float | None:
@@ -216,6 +387,34 @@ class RobotAPI:
         """
         return 0.8
 
+    def _conditional_get(self, url: str) -> bytes | None:
+        """
+        Send a GET request, reusing the last body when the server reports it unchanged.
+
+        The ETag of each response is remembered and sent back as If-None-Match, so an
+        unchanged resource costs a 304 Not Modified instead of a full body.
+
+        Args:
+            url (str): The URL to request.
+
+        Returns:
+            bytes | None: The response body, or None if the request was not successful.
+
+        Raises:
+            requests.RequestException: If the request fails.
+        """
+        cached = self._etags.get(url)
+        headers = {'If-None-Match': cached[0]} if cached else None
+        response = self._send('GET', url, poll=True, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        if response.status_code != 200:
+            return None
+        etag = response.headers.get('ETag')
+        if etag:
+            self._etags[url] = (etag, response.content)
+        return response.content
+
     def map(self, robot_name: str) -> str | None:
         """
         Get the name of the map the robot is currently on.
@@ -226,44 +425,62 @@ class RobotAPI:
         Returns:
             str | None: The name of the current map, or None if an error occurred.
         """
-        try:
-            map_list_response = requests.get(self.prefix + "kachaka/get_map_list")
-
-            if map_list_response.status_code != 200:
-                return None
-
-            map_list = map_list_response.json()['get_map_list']
-            if not map_list:
-                return None
-
-            current_map_url = self.prefix + "kachaka/get_current_map_id"
-            current_map_response = requests.get(current_map_url)
+        now = time.monotonic()
+        cached_at, cached_name = self._current_map_cache
+        if cached_name is not None and now - cached_at < self.map_cache_ttl:
+            return cached_name
 
-            if current_map_response.status_code != 200:
+        try:
+            current_map_body = self._conditional_get(self._urls["get_current_map_id"])
+            if current_map_body is None:
                 return None
 
-            current_map_id = current_map_response.json()['get_current_map_id']
-            current_map = next(
-                (m for m in map_list if m["id"] == current_map_id), None)
-
-            return current_map['name'] if current_map else "L1"
-        except requests.RequestException as e:
-            print(f"Error getting current map: {e}")
+            current_map_id = _json_loads(current_map_body)['get_current_map_id']
+
+            # The map list only changes when maps are added, removed or
+            # renamed, so it is refetched only when an unknown map ID shows
+            # up or the cached copy has expired
+            if (self._map_list_cache is None or current_map_id not in self._map_list_cache
+                    or now >= self._map_list_expiry):
+                map_list_body = self._conditional_get(self._urls["get_map_list"])
+                if map_list_body is None:
+                    return None
+
+                map_list = _json_loads(map_list_body)['get_map_list']
+                if not map_list:
+                    return None
+
+                self._map_list_cache = {m["id"]: m["name"] for m in map_list}
+                self._map_list_expiry = now + self.map_list_cache_ttl
+
+            current_map = self._map_list_cache.get(current_map_id, "L1")
+            self._current_map_cache = (now, current_map)
+            return current_map
+        except (requests.RequestException, KeyError, ValueError) as e:
+            logger.warning("Error getting current map: %s", e)
             return None
 
-    def is_command_completed(self) -> bool:
+    def is_command_completed(self, robot_name: str) -> bool:
         """
         Check if the robot has completed its last command.
 
+        Args:
+            robot_name (str): The name of the robot.
+
         Returns:
             bool: True if the last command has been completed, False otherwise.
         """
-        url = self.prefix + f"command_result?task_id={self.task_id}"
+        # The result URL only changes with the task, so it is rebuilt only
+        # when a new command has been issued
+        task_id, url = self._command_result_url
+        if task_id != self.task_id:
+            url = self.prefix + f"command_result?task_id={self.task_id}"
+            self._command_result_url = (self.task_id, url)
         try:
-            response = requests.get(url)
+            response = self._send('GET', url, poll=True)
             return response.status_code == 200
         except requests.RequestException as e:
-            print(f"Error checking command status: {e}")
+            logger.warning("Error checking command status: %s", e)
             return False
 
     def get_data(self, robot_name: str) -> RobotUpdateData | None:
@@ -276,9 +493,12 @@ class RobotAPI:
         Returns:
             RobotUpdateData | None: The latest update data for the robot, or None if an error occurred.
         """
-        map_name = self.map(robot_name)
+        # The map and position lookups are independent, so overlap their
+        # round trips instead of paying for each in turn
+        map_future = self._pool.submit(self.map, robot_name)
         position = self.position(robot_name)
         battery_soc = self.battery_soc(robot_name)
+        map_name = map_future.result()
 
         if map_name is None or position is None or battery_soc is None:
             return None
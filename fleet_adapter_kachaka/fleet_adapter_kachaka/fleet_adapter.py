@@ -34,6 +34,7 @@ import asyncio
 import sys
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import nudged
 import rclpy
@@ -49,6 +50,12 @@ from rmf_adapter import Transformation
 
 from .RobotClientAPI import RobotAPI
 
+# Prefer the libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 
 # ------------------------------------------------------------------------------
 # Helper functions
@@ -105,7 +112,7 @@ def main(argv: list[str] = sys.argv) -> None:
 
     # Parse the yaml in Python to get the fleet_manager info
     with open(config_path, "r") as f:
-        config_yaml = yaml.safe_load(f)
+        config_yaml = yaml.load(f, Loader=SafeLoader)
 
     # ROS 2 node for the command handle
     fleet_name = fleet_config.fleet_name
@@ -140,7 +147,7 @@ def main(argv: list[str] = sys.argv) -> None:
     fleet_handle = adapter.add_easy_fleet(fleet_config)
     # Initialize robot API for this fleet
     fleet_mgr_yaml = config_yaml['fleet_manager']
-    api = RobotAPI(fleet_mgr_yaml)
+    api = RobotAPI(fleet_mgr_yaml, len(fleet_config.known_robots))
 
     robots = {}
     for robot_name in fleet_config.known_robots:
@@ -154,18 +161,26 @@ def main(argv: list[str] = sys.argv) -> None:
     )
 
     def update_loop() -> None:
-        asyncio.set_event_loop(asyncio.new_event_loop())
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        # Give every robot its own worker so one slow robot never delays
+        # the others within a tick
+        loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=max(len(robots), 1))
+        )
         while rclpy.ok():
             now = node.get_clock().now()
 
             # Update all the robots in parallel using a thread pool
-            update_jobs = []
-            for robot in robots.values():
-                update_jobs.append(update_robot(robot))
-
-            asyncio.get_event_loop().run_until_complete(
-                asyncio.wait(update_jobs)
-            )
+            results = loop.run_until_complete(asyncio.gather(
+                *(update_robot(robot) for robot in robots.values()),
+                return_exceptions=True
+            ))
+            for robot_name, result in zip(robots, results):
+                if isinstance(result, Exception):
+                    node.get_logger().error(
+                        f'Failed to update [{robot_name}]: {result}'
+                    )
 
             next_wakeup = now + Duration(nanoseconds=update_period * 1e9)
             while node.get_clock().now() < next_wakeup:
@@ -181,7 +196,10 @@ def main(argv: list[str] = sys.argv) -> None:
     # Start the fleet adapter
     rclpy_executor.spin()
 
-    # Shutdown
+    # Shutdown, letting the update loop finish its last tick before the
+    # API it uses is closed
+    update_thread.join()
+    api.close()
     node.destroy_node()
     rclpy_executor.shutdown()
     rclpy.shutdown()
@@ -208,7 +226,7 @@ class RobotAdapter:
     def update(self, state: rmf_easy.RobotState) -> None:
         activity_identifier = None
         if self.execution:
-            if self.api.is_command_completed():
+            if self.api.is_command_completed(self.name):
                 self.execution.finished()
                 self.execution = None
             else:
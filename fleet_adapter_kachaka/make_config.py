@@ -15,10 +15,69 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
+import copy
+import functools
 import getpass
+import os
+import re
 
 import yaml
 
+# Prefer the libyaml-backed loader and dumper when PyYAML was built with it
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper
+    from yaml import SafeLoader
+
+COORDINATE_RE = re.compile(
+    r'^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*,\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*$')
+
+
+class CoordinatePair(list):
+    """An [x, y] coordinate that is written to YAML on a single line."""
+
+
+def represent_coordinate_pair(dumper: yaml.SafeDumper, data: CoordinatePair) -> yaml.SequenceNode:
+    return dumper.represent_sequence('tag:yaml.org,2002:seq', data, flow_style=True)
+
+
+SafeDumper.add_representer(CoordinatePair, represent_coordinate_pair)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_template(path: str, mtime_ns: int) -> tuple[str, dict]:
+    with open(path, 'rb') as file:
+        text = file.read().decode('utf-8')
+    return text, yaml.load(text, Loader=SafeLoader)
+
+
+def load_template(path: str) -> tuple[str, dict]:
+    # The parsed template is cached per modification time; callers get a
+    # copy they are free to modify
+    text, config = _load_template(path, os.stat(path).st_mtime_ns)
+    return text, copy.deepcopy(config)
+
+
+def dump_yaml(data: dict) -> str:
+    return yaml.dump(data, Dumper=SafeDumper, sort_keys=False, default_flow_style=False, allow_unicode=True)
+
+
+def render_config(template_text: str, config: dict, sections: tuple[str, ...]) -> str:
+    # Only the given sections are emitted; they replace their empty
+    # placeholders in the template text so its comments and layout survive
+    for key in sections:
+        section_text = dump_yaml({key: config[key]}).rstrip('\n')
+        template_text, found = re.subn(
+            rf'^{key}:[ \t]*$', lambda _: section_text, template_text, count=1, flags=re.MULTILINE)
+        if not found:
+            # The template does not have an empty placeholder for this
+            # section, so fall back to dumping the whole document
+            return dump_yaml(config)
+    return template_text
+
 
 def get_user_input(prompt: str, default: str = None) -> str:
     if default:
@@ -28,68 +87,153 @@ def get_user_input(prompt: str, default: str = None) -> str:
         return input(f"{prompt}: ")
 
 
-# Load the existing config_template.yaml
-try:
-    with open('config_template.yaml', 'r') as file:
-        config = yaml.safe_load(file)
-except yaml.YAMLError as exc:
-    print(f"Error loading YAML file: {exc}")
-    exit(1)
-except FileNotFoundError:
-    print("config_template.yaml not found. Try running this script from the correct directory.")
-    exit(1)
-
-# Configure fleet_manager
-config['fleet_manager'] = {}
-config['fleet_manager']['prefix'] = get_user_input(
-    "Fleet Manager prefix", "http://192.168.1.100:26502/")
-config['fleet_manager']['user'] = get_user_input(
-    "Fleet Manager username", "some_user")
-config['fleet_manager']['password'] = getpass.getpass(
-    "Fleet Manager password (default: some_password): ") or "some_password"
-# Configure reference_coordinates
-config['reference_coordinates'] = {}
-while True:
-    level_name = get_user_input(
-        "Level name for coordinates (enter 'q' to finish)")
-    if level_name == 'q':
-        break
-    config['reference_coordinates'][level_name] = {}
-    config['reference_coordinates'][level_name]['rmf'] = []
-    config['reference_coordinates'][level_name]['robot'] = []
-    print(f"RMF coordinates for level: {level_name} (at least 2 required, 4 recommended) (enter 'q' to finish)")
-    count = 0
+def parse_coordinate(text: str) -> CoordinatePair:
+    match = COORDINATE_RE.match(text)
+    if not match:
+        raise ValueError(f"Invalid coordinate: {text.strip()!r}")
+    return CoordinatePair([float(match.group(1)), float(match.group(2))])
+
+
+def read_pasted_coordinates() -> list[CoordinatePair]:
+    print("Paste one 'x, y' coordinate per line, followed by an empty line.")
+    lines = []
     while True:
-        rmf_coord = get_user_input("RMF coordinate (e.g., 25.4962, -9.0341)")
-        if rmf_coord == 'q':
-            if count < 2:
-                print("Please enter at least 2 RMF coordinates.")
-                continue
+        line = input()
+        if not line.strip():
             break
-        rmf_x, rmf_y = map(float, rmf_coord.split(','))
-        config['reference_coordinates'][level_name]['rmf'].append([rmf_x, rmf_y])
-        count += 1
-    print(f"Robot coordinates for level: {level_name} (same number as RMF coordinates required)")
-    while count > 0:
-        robot_coord = get_user_input("Robot coordinate (e.g., 0.679, 1.447)")
-        try:
-            robot_x, robot_y = map(float, robot_coord.split(','))
-        except ValueError:
-            print("Invalid input. Please try again.")
-            continue
-        config['reference_coordinates'][level_name]['robot'].append([robot_x, robot_y])
-        count -= 1
-
-while True:
-    # Get the output file name
-    output_file = get_user_input(
-        "Enter the output file name (e.g., config_custom.yaml)", "config_custom.yaml")
+        lines.append(line)
+    return [parse_coordinate(line) for line in lines]
+
+
+def read_coordinates_file(path: str) -> list[CoordinatePair]:
+    with open(path, 'r') as file:
+        return [parse_coordinate(line) for line in file if line.strip()]
+
+
+def read_level_coordinates(spec: str) -> tuple[str, dict]:
     try:
-        # Write the configuration to the YAML file
-        with open(output_file, 'w') as file:
-            yaml.safe_dump(config, file)
-        break
-    except (FileNotFoundError, PermissionError) as e:
-        print(f"Error: {e}. Please try again.")
-
-print(f"Configuration completed. Please check the {output_file} file.")
+        level_name, rmf_path, robot_path = spec.split(':', 2)
+    except ValueError:
+        raise ValueError(f"Expected LEVEL:RMF_CSV:ROBOT_CSV, got {spec!r}") from None
+    rmf = read_coordinates_file(rmf_path)
+    robot = read_coordinates_file(robot_path)
+    if len(rmf) < 2:
+        raise ValueError(f"{rmf_path}: at least 2 RMF coordinates are required")
+    if len(rmf) != len(robot):
+        raise ValueError(f"{rmf_path} and {robot_path} must contain the same number of coordinates")
+    return level_name, {'rmf': rmf, 'robot': robot}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Create a fleet adapter config from config_template.yaml")
+    parser.add_argument("--coords-file", action="append", default=[], metavar="LEVEL:RMF_CSV:ROBOT_CSV",
+                        help="Read the reference coordinates of a level from two files of 'x, y' lines "
+                             "instead of prompting for them. May be given once per level.")
+    args = parser.parse_args()
+
+    # Load the existing config_template.yaml
+    try:
+        template_text, config = load_template('config_template.yaml')
+    except yaml.YAMLError as exc:
+        print(f"Error loading YAML file: {exc}")
+        exit(1)
+    except FileNotFoundError:
+        print("config_template.yaml not found. Try running this script from the correct directory.")
+        exit(1)
+
+    # Reference coordinates given as files are read before any prompt so
+    # that a bad file is reported right away
+    config['reference_coordinates'] = {}
+    for spec in args.coords_file:
+        try:
+            level_name, coordinates = read_level_coordinates(spec)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            exit(1)
+        config['reference_coordinates'][level_name] = coordinates
+
+    # Configure fleet_manager
+    config['fleet_manager'] = {}
+    config['fleet_manager']['prefix'] = get_user_input(
+        "Fleet Manager prefix", "http://192.168.1.100:26502/")
+    config['fleet_manager']['user'] = get_user_input(
+        "Fleet Manager username", "some_user")
+    config['fleet_manager']['password'] = getpass.getpass(
+        "Fleet Manager password (default: some_password): ") or "some_password"
+    # Configure reference_coordinates interactively
+    while not args.coords_file:
+        level_name = get_user_input(
+            "Level name for coordinates (enter 'q' to finish)")
+        if level_name == 'q':
+            break
+        config['reference_coordinates'][level_name] = {}
+        config['reference_coordinates'][level_name]['rmf'] = []
+        config['reference_coordinates'][level_name]['robot'] = []
+        print(f"RMF coordinates for level: {level_name} (at least 2 required, 4 recommended) (enter 'q' to finish)")
+        count = 0
+        while True:
+            rmf_coord = get_user_input("RMF coordinate (e.g., 25.4962, -9.0341, or 'paste' for several at once)")
+            if rmf_coord == 'q':
+                if count < 2:
+                    print("Please enter at least 2 RMF coordinates.")
+                    continue
+                break
+            if rmf_coord == 'paste':
+                try:
+                    coordinates = read_pasted_coordinates()
+                except ValueError:
+                    print("Invalid input. Please try again.")
+                    continue
+                config['reference_coordinates'][level_name]['rmf'].extend(coordinates)
+                count += len(coordinates)
+                continue
+            try:
+                coordinate = parse_coordinate(rmf_coord)
+            except ValueError:
+                print("Invalid input. Please try again.")
+                continue
+            config['reference_coordinates'][level_name]['rmf'].append(coordinate)
+            count += 1
+        print(f"Robot coordinates for level: {level_name} (same number as RMF coordinates required)")
+        while count > 0:
+            robot_coord = get_user_input("Robot coordinate (e.g., 0.679, 1.447, or 'paste' for several at once)")
+            if robot_coord == 'paste':
+                try:
+                    coordinates = read_pasted_coordinates()
+                except ValueError:
+                    print("Invalid input. Please try again.")
+                    continue
+                if len(coordinates) > count:
+                    print(f"Too many coordinates. Please enter {count} more.")
+                    continue
+                config['reference_coordinates'][level_name]['robot'].extend(coordinates)
+                count -= len(coordinates)
+                continue
+            try:
+                coordinate = parse_coordinate(robot_coord)
+            except ValueError:
+                print("Invalid input. Please try again.")
+                continue
+            config['reference_coordinates'][level_name]['robot'].append(coordinate)
+            count -= 1
+
+    # Serialize once up front so the file is written in a single call
+    config_text = render_config(template_text, config, ('fleet_manager', 'reference_coordinates'))
+    while True:
+        # Get the output file name
+        output_file = get_user_input(
+            "Enter the output file name (e.g., config_custom.yaml)", "config_custom.yaml")
+        try:
+            # Write the configuration to the YAML file
+            with open(output_file, 'w', encoding='utf-8') as file:
+                file.write(config_text)
+            break
+        except (FileNotFoundError, PermissionError) as e:
+            print(f"Error: {e}. Please try again.")
+
+    print(f"Configuration completed. Please check the {output_file} file.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# Copyright (c) 2024 SoftBank Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import yaml
+
+from make_config import CoordinatePair
+from make_config import load_template
+from make_config import render_config
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), '..', 'config_template.yaml')
+SECTIONS = ('fleet_manager', 'reference_coordinates')
+
+
+def _filled_template() -> tuple[str, dict]:
+    template_text, config = load_template(TEMPLATE_PATH)
+    config['fleet_manager'] = {'prefix': 'http://192.168.1.100:26502/', 'user': 'user', 'password': 'pässwörd'}
+    config['reference_coordinates'] = {
+        'L1': {
+            'rmf': [CoordinatePair([25.4962, -9.0341]), CoordinatePair([1e-05, 2.0])],
+            'robot': [CoordinatePair([0.679, 1.447]), CoordinatePair([-3.0, 4.5])],
+        },
+    }
+    return template_text, config
+
+
+def test_render_config_fills_template_placeholders() -> None:
+    template_text, config = _filled_template()
+
+    rendered = render_config(template_text, config, SECTIONS)
+
+    assert yaml.safe_load(rendered) == config
+    # The template's comments survive
+    assert '# TRANSFORM CONFIG' in rendered
+    assert '- [25.4962, -9.0341]' in rendered
+
+
+def test_render_config_falls_back_without_placeholder() -> None:
+    template_text, config = _filled_template()
+    template_text = template_text.replace('\nreference_coordinates:', '\n')
+
+    rendered = render_config(template_text, config, SECTIONS)
+
+    assert yaml.safe_load(rendered) == config
+    assert '# TRANSFORM CONFIG' not in rendered
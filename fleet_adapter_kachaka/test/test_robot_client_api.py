@@ -0,0 +1,167 @@
+# Copyright (c) 2024 SoftBank Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+from fleet_adapter_kachaka.RobotClientAPI import RobotAPI
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Answer each path with the (status, body, etag) registered in server.routes.
+
+    A path with seconds queued in server.delays waits the next of them before the request
+    is recorded in server.bodies and answered.
+    """
+
+    def _reply(self) -> None:
+        request_body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        path = self.path.split('?')[0]
+        self.server.requests.append((self.command, path, self.headers.get('If-None-Match')))
+        if self.server.delays.get(path):
+            time.sleep(self.server.delays[path].pop(0))
+        self.server.bodies.append((path, request_body))
+        status, body, etag = self.server.routes.get(path, (404, b'', None))
+        if etag is not None and self.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+        self.send_response(status)
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server() -> Iterator[ThreadingHTTPServer]:
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    httpd.routes = {}
+    httpd.requests = []
+    httpd.bodies = []
+    httpd.delays = {}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def api(server: ThreadingHTTPServer) -> Iterator[RobotAPI]:
+    api = RobotAPI({'prefix': f'http://127.0.0.1:{server.server_port}/', 'user': 'user', 'password': 'pass'})
+    yield api
+    api.close()
+
+
+def test_conditional_get_reuses_body_on_not_modified(server: ThreadingHTTPServer, api: RobotAPI) -> None:
+    server.routes['/kachaka/get_current_map_id'] = (200, b'{"get_current_map_id": "map-1"}', '"v1"')
+    url = api._urls['get_current_map_id']
+
+    first = api._conditional_get(url)
+    second = api._conditional_get(url)
+
+    assert first == second == b'{"get_current_map_id": "map-1"}'
+    assert [etag for _, _, etag in server.requests] == [None, '"v1"']
+
+
+def test_position_fetches_every_call(server: ThreadingHTTPServer, api: RobotAPI) -> None:
+    server.routes['/kachaka/get_robot_pose'] = (200, b'{"get_robot_pose": {"x": 1.0, "y": 2.0, "theta": 0.5}}', None)
+
+    assert api.position('robot') == (1.0, 2.0, 0.5)
+    assert api.position('robot') == (1.0, 2.0, 0.5)
+    assert len(server.requests) == 2
+
+
+def test_connect_timeout_fails_fast_until_backoff_expires(
+        server: ThreadingHTTPServer, api: RobotAPI, monkeypatch: pytest.MonkeyPatch) -> None:
+    server.routes['/kachaka/get_robot_serial_number'] = (200, b'{}', None)
+    server.routes['/kachaka/cancel_command'] = (200, b'{"cancel_command": {"success": true}}', None)
+    url = api._urls['get_robot_serial_number']
+    api.unreachable_backoff = 0.2
+    request = api.session.request
+    calls = []
+
+    def timing_out_once(*args, **kwargs) -> requests.Response:
+        calls.append(args)
+        if len(calls) == 1:
+            raise requests.ConnectTimeout('connect timed out')
+        return request(*args, **kwargs)
+
+    monkeypatch.setattr(api.session, 'request', timing_out_once)
+
+    with pytest.raises(requests.ConnectTimeout):
+        api._send('GET', url, poll=True)
+    # Within the window a poll is refused without touching the network
+    with pytest.raises(requests.ConnectionError):
+        api._send('GET', url, poll=True)
+    assert len(calls) == 1
+    assert not api.check_connection()
+    assert len(calls) == 1
+
+    # but a command still reaches the robot
+    assert api.stop('robot')
+    assert len(calls) == 2
+
+    time.sleep(0.25)
+    assert api._send('GET', url, poll=True).status_code == 200
+    assert len(calls) == 3
+
+
+def test_failed_velocity_request_forgets_last_velocity(server: ThreadingHTTPServer, api: RobotAPI) -> None:
+    server.routes['/kachaka/move_to_pose'] = (200, b'{"id": "task"}', None)
+    server.routes['/kachaka/set_robot_velocity'] = (200, b'{}', None)
+
+    assert api.navigate('robot', [0.0, 0.0, 0.0], 'L1', 0.5)
+    assert api._last_velocity['robot'] == (0.5, 1.0)
+
+    # An unchanged limit is not sent again
+    assert api.navigate('robot', [0.0, 0.0, 0.0], 'L1', 0.5)
+    assert sum(path == '/kachaka/set_robot_velocity' for _, path, _ in server.requests) == 1
+
+    server.routes['/kachaka/set_robot_velocity'] = (500, b'', None)
+    assert api.navigate('robot', [0.0, 0.0, 0.0], 'L1', 0.7)
+    assert 'robot' not in api._last_velocity
+
+
+def test_velocity_limits_reach_robot_in_order(server: ThreadingHTTPServer, api: RobotAPI) -> None:
+    server.routes['/kachaka/move_to_pose'] = (200, b'{"id": "task"}', None)
+    server.routes['/kachaka/set_robot_velocity'] = (200, b'{}', None)
+    # The first limit is answered slowly; it must still be applied before
+    # its own move and before the next limit
+    server.delays['/kachaka/set_robot_velocity'] = [0.3]
+
+    assert api.navigate('robot', [0.0, 0.0, 0.0], 'L1', 0.5)
+    assert api.navigate('robot', [1.0, 0.0, 0.0], 'L1', 0.7)
+
+    assert [path for path, _ in server.bodies] == ['/kachaka/set_robot_velocity', '/kachaka/move_to_pose'] * 2
+    velocities = [json.loads(body)['linear'] for path, body in server.bodies if path.endswith('velocity')]
+    assert velocities == [0.5, 0.7]
+    assert api._last_velocity['robot'] == (0.7, 1.0)
+
+    # Going back to the earlier limit sends it again
+    assert api.navigate('robot', [0.0, 0.0, 0.0], 'L1', 0.5)
+    assert json.loads(server.bodies[-2][1])['linear'] == 0.5